@@ -42,6 +42,20 @@ def print_banner():
     print("Version: 1.0.0")
     print("=" * 60)
     
+def write_file_atomic(path, content, mode=None):
+    """Write a file via a same-directory temp file and os.replace"""
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    
+    with open(tmp_path, "w") as f:
+        f.write(content)
+    
+    if mode is not None:
+        os.chmod(tmp_path, mode)
+    
+    # Same filesystem, so the rename is atomic
+    os.replace(tmp_path, path)
+
 def create_directories():
     """Create installation directories"""
     logger.info(f"Creating installation directories at {INSTALL_DIR}")
@@ -123,11 +137,7 @@ echo "Web dashboard available at: http://localhost:8080/dashboard.html"
 """
         
         startup_path = Path(INSTALL_DIR) / "start.sh"
-        with open(startup_path, "w") as f:
-            f.write(startup_script)
-        
-        # Make executable
-        os.chmod(startup_path, 0o755)
+        write_file_atomic(startup_path, startup_script, 0o755)
         
         logger.info("Startup script created successfully")
         return True
@@ -162,11 +172,7 @@ echo "Robot AI services stopped"
 """
         
         shutdown_path = Path(INSTALL_DIR) / "stop.sh"
-        with open(shutdown_path, "w") as f:
-            f.write(shutdown_script)
-        
-        # Make executable
-        os.chmod(shutdown_path, 0o755)
+        write_file_atomic(shutdown_path, shutdown_script, 0o755)
         
         logger.info("Shutdown script created successfully")
         return True
@@ -194,8 +200,7 @@ def create_config():
         }
         
         config_path = Path(INSTALL_DIR) / "config.json"
-        with open(config_path, "w") as f:
-            json.dump(config, f, indent=4)
+        write_file_atomic(config_path, json.dumps(config, indent=4))
         
         logger.info("Configuration file created successfully")
         return True
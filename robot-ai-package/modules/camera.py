@@ -14,19 +14,19 @@ Version: 1.0.0
 """
 
 import asyncio
-import base64
 import io
 import json
 import logging
 import os
 import signal
-import subprocess
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional, Tuple, Any, Union
+from typing import Dict, List, Optional, Tuple, Any
 
+import numpy as np
 import requests
 import websockets
 from PIL import Image, ImageDraw, ImageFont
@@ -38,6 +38,36 @@ try:
 except ImportError:
     JMUXER_AVAILABLE = False
 
+# Try to import pybase64 for SIMD base64 decoding
+try:
+    from pybase64 import b64decode
+    PYBASE64_AVAILABLE = True
+except ImportError:
+    from base64 import b64decode
+    PYBASE64_AVAILABLE = False
+
+# Try to import uvloop for a faster event loop
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+# Try to import numba for the depth conversion kernel
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    prange = range
+    NUMBA_AVAILABLE = False
+
+# Try to import PyTurboJPEG for SIMD JPEG decoding (libjpeg-turbo)
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB, TJSAMP_420, TJFLAG_FASTDCT
+    TURBOJPEG_AVAILABLE = True
+except ImportError:
+    TURBOJPEG_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -49,6 +79,56 @@ logging.basicConfig(
 )
 logger = logging.getLogger('robot-ai-camera')
 
+# Seconds without a frame reader before JPEG decoding is throttled
+CONSUMER_IDLE_TIMEOUT = 1.0
+
+# While idle, decode only every Nth JPEG or depth frame
+IDLE_DECODE_INTERVAL = 10
+
+# JPEG payloads buffered for decoding before the oldest is dropped
+JPEG_QUEUE_SIZE = 2
+
+# Smallest base64 payload that can hold a valid JPEG (~125 bytes decoded)
+MIN_JPEG_BASE64_LEN = 168
+
+# Pending async frame callback calls before new frames are dropped for them
+MAX_CALLBACK_BACKLOG = 4
+
+# Raw depth encodings holding one uint16 (millimetres) per pixel
+DEPTH16_ENCODINGS = frozenset(("16UC1", "mono16"))
+
+# Depth in millimetres mapped to full white in depth visualizations
+DEPTH_MAX_RANGE = 5000
+
+# Depth camera positions published under /depth_camera/<position>/...
+DEPTH_CAMERA_POSITIONS = frozenset(("downward", "upward", "forward"))
+
+# Quality used when encoding frames to JPEG files
+JPEG_QUALITY = 80
+
+# Annotation colors and font, resolved once instead of per draw call
+TEXT_COLOR = (255, 255, 255)
+BOX_COLOR = (0, 255, 0)
+DEFAULT_FONT = ImageFont.load_default()
+
+def _depth16_to_rgb8(depth: np.ndarray, max_depth: int, out: np.ndarray):
+    """Scale 16-bit depth to 0-255 grey and write it into an HxWx3 uint8 array"""
+    height, width = depth.shape
+    for y in prange(height):
+        for x in range(width):
+            value = min(int(depth[y, x]), max_depth) * 255 // max_depth
+            out[y, x, 0] = value
+            out[y, x, 1] = value
+            out[y, x, 2] = value
+
+if NUMBA_AVAILABLE:
+    depth16_to_rgb8 = njit(parallel=True, fastmath=True, cache=True)(_depth16_to_rgb8)
+else:
+    def depth16_to_rgb8(depth: np.ndarray, max_depth: int, out: np.ndarray):
+        """Scale 16-bit depth to 0-255 grey and write it into an HxWx3 uint8 array"""
+        grey = np.minimum(depth, max_depth).astype(np.uint32) * 255 // max_depth
+        out[...] = grey[..., np.newaxis]
+
 class CameraState(Enum):
     """Camera state enum"""
     INACTIVE = "inactive"
@@ -69,11 +149,41 @@ class CameraFormat(Enum):
     JPEG = "jpeg"
     RAW = "raw"
 
+class CameraSlot:
+    """Per-camera stream state, slotted to keep hot per-frame fields compact"""
+    
+    __slots__ = (
+        "state", "last_frame", "last_frame_time", "stream_format", "resolution",
+        "fps", "frames_received", "errors", "fps_window_start", "fps_window_frames",
+        "jpeg_cache"
+    )
+    
+    def __init__(self):
+        self.state = CameraState.INACTIVE
+        self.last_frame = None
+        self.last_frame_time = None
+        self.stream_format = CameraFormat.JPEG
+        self.resolution = (320, 240)
+        self.fps = 0
+        self.frames_received = 0
+        self.errors = 0
+        
+        # FPS measurement window
+        self.fps_window_start = None
+        self.fps_window_frames = 0
+        
+        # (frame, JPEG bytes) for the last frame that was encoded
+        self.jpeg_cache = None
+
 class CameraModule:
     """Camera module for Robot AI providing enhanced camera functionality"""
     
     def __init__(self, robot_ip: str, robot_port: int = 8090, use_ssl: bool = False):
-        """Initialize the Camera Module with connection details"""
+        """Initialize the Camera Module with connection details
+        
+        Must be created inside a running event loop; run under uvloop where
+        available (the module's own entry point installs it).
+        """
         self.robot_ip = robot_ip
         self.robot_port = robot_port
         self.use_ssl = use_ssl
@@ -83,52 +193,70 @@ class CameraModule:
         self.ws_url = f"{self.ws_protocol}://{self.robot_ip}:{self.robot_port}/ws/v2/topics"
         
         # Camera state
-        self.cameras = {
-            CameraType.FRONT: {
-                "state": CameraState.INACTIVE,
-                "last_frame": None,
-                "last_frame_time": None,
-                "stream_format": CameraFormat.JPEG,
-                "resolution": (320, 240),
-                "fps": 0,
-                "frames_received": 0,
-                "errors": 0
-            },
-            CameraType.BACK: {
-                "state": CameraState.INACTIVE,
-                "last_frame": None,
-                "last_frame_time": None,
-                "stream_format": CameraFormat.JPEG,
-                "resolution": (320, 240),
-                "fps": 0,
-                "frames_received": 0,
-                "errors": 0
-            },
-            CameraType.DEPTH: {
-                "state": CameraState.INACTIVE,
-                "last_frame": None,
-                "last_frame_time": None,
-                "stream_format": CameraFormat.JPEG,
-                "resolution": (320, 240),
-                "fps": 0,
-                "frames_received": 0,
-                "errors": 0
-            }
-        }
+        self.cameras = {camera_type: CameraSlot() for camera_type in CameraType}
+        
+        # RGB stream topic -> (format, camera), so incoming frames are routed
+        # with a single dict lookup instead of parsing the topic string
+        self.topic_routes = {}
+        for camera_type in CameraType:
+            self.topic_routes[f"/rgb_cameras/{camera_type.value}/video"] = (CameraFormat.H264, camera_type)
+            self.topic_routes[f"/rgb_cameras/{camera_type.value}/compressed"] = (CameraFormat.JPEG, camera_type)
         
         # WebSocket connection
         self.ws = None
         self.active_streams = set()
         
+        # Per-camera events set (and replaced) whenever a new frame is stored
+        self.frame_events = {camera_type: asyncio.Event() for camera_type in CameraType}
+        self.frame_waiters = 0
+        
+        # Last time a caller read a frame, used to skip decoding while idle
+        self.last_consumer_time = 0.0
+        
         # Frame processing callbacks
         self.frame_callbacks = []
+        self.async_frame_callbacks = []
+        self.async_callbacks_pending = 0
+        self.callback_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="camera-callback")
+        
+        # Annotation key -> drawer, applied in this order by get_annotated_frame
+        self.annotation_drawers = (
+            ("timestamp", self.draw_timestamp),
+            ("fps", self.draw_fps),
+            ("boxes", self.draw_boxes),
+            ("text", self.draw_text)
+        )
         
         # Decoder for h264 streams
         self.decoder = None if not JMUXER_AVAILABLE else jmuxer.JMuxer(mode="video", flushingTime=0)
         
+        # JPEG codec for camera frames (falls back to PIL when libjpeg-turbo is missing);
+        # the Python package can import fine while the native library is absent
+        self.jpeg_codec = None
+        if TURBOJPEG_AVAILABLE:
+            try:
+                self.jpeg_codec = TurboJPEG()
+            except Exception as e:
+                logger.error(f"Failed to load libjpeg-turbo, falling back to PIL: {e}")
+        
+        # Worker threads for JPEG decoding so the event loop is not blocked;
+        # libjpeg-turbo and pybase64 release the GIL while decoding
+        self.decode_pool = ThreadPoolExecutor(
+            max_workers=max(2, (os.cpu_count() or 2) // 2),
+            thread_name_prefix="camera-decode"
+        )
+        
+        # Bounded queue of JPEG payloads waiting for the decode worker
+        self.jpeg_queue = asyncio.Queue(maxsize=JPEG_QUEUE_SIZE)
+        self.decode_task = None
+        
+        # ffmpeg H264 encoder, probed on first video capture
+        self.video_encoder = None
+        
         # Storage for frames
         self.frame_storage_path = os.path.join(os.getcwd(), "camera_frames")
-        os.makedirs(self.frame_storage_path, exist_ok=True)
+        self.created_dirs = set()
+        self.ensure_dir(self.frame_storage_path)
         
         logger.info(f"Camera Module initialized for robot at {self.base_url}")
     
@@ -139,6 +267,10 @@ class CameraModule:
         try:
             self.ws = await websockets.connect(self.ws_url)
             
+            # Start the JPEG decode worker (kept running across reconnects)
+            if not self.decode_task or self.decode_task.done():
+                self.decode_task = asyncio.create_task(self.decode_worker())
+            
             logger.info("Successfully connected to robot")
             return True
         except Exception as e:
@@ -154,8 +286,8 @@ class CameraModule:
         try:
             # Update camera state
             camera = self.cameras[camera_type]
-            camera["state"] = CameraState.CONNECTING
-            camera["stream_format"] = format
+            camera.state = CameraState.CONNECTING
+            camera.stream_format = format
             
             # Enable topics based on format and camera type
             topic = None
@@ -168,7 +300,7 @@ class CameraModule:
             
             if not topic:
                 logger.error(f"Unsupported combination: camera={camera_type.value}, format={format.value}")
-                camera["state"] = CameraState.ERROR
+                camera.state = CameraState.ERROR
                 return False
             
             # Enable the topic
@@ -179,12 +311,12 @@ class CameraModule:
             self.active_streams.add(topic)
             
             logger.info(f"Started {format.value} stream from {camera_type.value} camera")
-            camera["state"] = CameraState.STREAMING
+            camera.state = CameraState.STREAMING
             return True
             
         except Exception as e:
             logger.error(f"Error starting camera stream: {e}")
-            self.cameras[camera_type]["state"] = CameraState.ERROR
+            self.cameras[camera_type].state = CameraState.ERROR
             return False
     
     async def stop_camera_stream(self, camera_type: CameraType):
@@ -196,7 +328,7 @@ class CameraModule:
         try:
             # Get the active topic for this camera
             camera = self.cameras[camera_type]
-            format = camera["stream_format"]
+            format = camera.stream_format
             
             # Determine the topic to disable
             topic = None
@@ -220,7 +352,7 @@ class CameraModule:
                 self.active_streams.remove(topic)
             
             # Update camera state
-            camera["state"] = CameraState.INACTIVE
+            camera.state = CameraState.INACTIVE
             
             logger.info(f"Stopped stream from {camera_type.value} camera")
             return True
@@ -264,6 +396,8 @@ class CameraModule:
     
     async def process_camera_message(self, message: str):
         """Process incoming WebSocket messages related to cameras"""
+        camera_type = None
+        
         try:
             data = json.loads(message)
             topic = data.get("topic")
@@ -271,126 +405,73 @@ class CameraModule:
             if not topic:
                 return
             
+            route = self.topic_routes.get(topic)
+            
             # Process RGB video streams (H264)
-            if topic.startswith("/rgb_cameras/") and topic.endswith("/video"):
-                camera_name = topic.split("/")[2]
-                camera_type = CameraType(camera_name) if camera_name in [ct.value for ct in CameraType] else None
-                
-                if not camera_type:
-                    logger.warning(f"Unknown camera type in topic: {topic}")
-                    return
+            if route and route[0] == CameraFormat.H264:
+                camera_type = route[1]
                 
                 # Process H264 video data
                 video_data = data.get("data")
                 timestamp = data.get("stamp")
                 
-                if not video_data:
+                if not video_data or not isinstance(video_data, str):
                     logger.warning(f"No video data in message for {camera_type.value} camera")
                     return
                 
                 # Decode base64 data
-                try:
-                    binary_data = base64.b64decode(video_data)
-                    
-                    # If jmuxer is available, decode the H264 data
-                    if JMUXER_AVAILABLE and self.decoder:
-                        self.decoder.feed({video: binary_data})
-                    
-                    # Update camera state
-                    camera = self.cameras[camera_type]
-                    camera["last_frame_time"] = timestamp
-                    camera["frames_received"] += 1
-                    
-                    # Calculate FPS
-                    current_time = time.time()
-                    if not hasattr(self, f"last_fps_calc_{camera_type.value}"):
-                        setattr(self, f"last_fps_calc_{camera_type.value}", current_time)
-                        setattr(self, f"frames_since_last_calc_{camera_type.value}", 1)
-                    else:
-                        last_time = getattr(self, f"last_fps_calc_{camera_type.value}")
-                        frames = getattr(self, f"frames_since_last_calc_{camera_type.value}") + 1
-                        
-                        if current_time - last_time >= 1.0:  # Calculate FPS every second
-                            camera["fps"] = frames / (current_time - last_time)
-                            setattr(self, f"last_fps_calc_{camera_type.value}", current_time)
-                            setattr(self, f"frames_since_last_calc_{camera_type.value}", 0)
-                        else:
-                            setattr(self, f"frames_since_last_calc_{camera_type.value}", frames)
-                    
-                    # Run frame callbacks
-                    for callback in self.frame_callbacks:
-                        try:
-                            callback(camera_type, "h264", binary_data, timestamp)
-                        except Exception as cb_error:
-                            logger.error(f"Error in frame callback: {cb_error}")
+                binary_data = b64decode(video_data)
                 
-                except Exception as decode_error:
-                    logger.error(f"Error decoding H264 data: {decode_error}")
-                    self.cameras[camera_type]["errors"] += 1
+                # If jmuxer is available, decode the H264 data
+                if JMUXER_AVAILABLE and self.decoder:
+                    self.decoder.feed({video: binary_data})
+                
+                # Update camera state
+                camera = self.cameras[camera_type]
+                camera.last_frame_time = timestamp
+                camera.frames_received += 1
+                self.update_fps(camera_type)
+                
+                # Run frame callbacks
+                self.run_frame_callbacks(camera_type, "h264", binary_data, timestamp)
             
             # Process RGB image streams (JPEG)
-            elif topic.startswith("/rgb_cameras/") and topic.endswith("/compressed"):
-                camera_name = topic.split("/")[2]
-                camera_type = CameraType(camera_name) if camera_name in [ct.value for ct in CameraType] else None
-                
-                if not camera_type:
-                    logger.warning(f"Unknown camera type in topic: {topic}")
-                    return
+            elif route:
+                camera_type = route[1]
                 
                 # Process JPEG image data
                 image_data = data.get("data")
                 timestamp = data.get("stamp")
                 format = data.get("format", "jpeg")
                 
-                if not image_data or format.lower() != "jpeg":
+                if not isinstance(image_data, str) or format.lower() != "jpeg":
                     logger.warning(f"Invalid image data in message for {camera_type.value} camera")
                     return
                 
-                # Decode base64 data
-                try:
-                    binary_data = base64.b64decode(image_data)
-                    
-                    # Create PIL Image from binary data
-                    image = Image.open(io.BytesIO(binary_data))
-                    
-                    # Update camera state
-                    camera = self.cameras[camera_type]
-                    camera["last_frame"] = image
-                    camera["last_frame_time"] = timestamp
-                    camera["resolution"] = image.size
-                    camera["frames_received"] += 1
-                    
-                    # Calculate FPS
-                    current_time = time.time()
-                    if not hasattr(self, f"last_fps_calc_{camera_type.value}"):
-                        setattr(self, f"last_fps_calc_{camera_type.value}", current_time)
-                        setattr(self, f"frames_since_last_calc_{camera_type.value}", 1)
-                    else:
-                        last_time = getattr(self, f"last_fps_calc_{camera_type.value}")
-                        frames = getattr(self, f"frames_since_last_calc_{camera_type.value}") + 1
-                        
-                        if current_time - last_time >= 1.0:  # Calculate FPS every second
-                            camera["fps"] = frames / (current_time - last_time)
-                            setattr(self, f"last_fps_calc_{camera_type.value}", current_time)
-                            setattr(self, f"frames_since_last_calc_{camera_type.value}", 0)
-                        else:
-                            setattr(self, f"frames_since_last_calc_{camera_type.value}", frames)
-                    
-                    # Run frame callbacks
-                    for callback in self.frame_callbacks:
-                        try:
-                            callback(camera_type, "jpeg", image, timestamp)
-                        except Exception as cb_error:
-                            logger.error(f"Error in frame callback: {cb_error}")
+                # Truncated and keepalive frames are too short to be a JPEG
+                if len(image_data) < MIN_JPEG_BASE64_LEN:
+                    self.cameras[camera_type].errors += 1
+                    return
                 
-                except Exception as decode_error:
-                    logger.error(f"Error decoding JPEG data: {decode_error}")
-                    self.cameras[camera_type]["errors"] += 1
+                camera = self.cameras[camera_type]
+                camera.frames_received += 1
+                self.update_fps(camera_type)
+                
+                # Nobody is reading frames: only decode every Nth one so the
+                # stored frame stays reasonably fresh for the next reader
+                if self.is_idle() and camera.frames_received % IDLE_DECODE_INTERVAL:
+                    return
+                
+                # Hand the payload to the decode worker; if it is falling behind,
+                # drop the oldest queued frame rather than letting the queue grow
+                if self.jpeg_queue.full():
+                    self.jpeg_queue.get_nowait()
+                self.jpeg_queue.put_nowait((camera_type, image_data, timestamp))
             
             # Process depth camera images
             elif topic.startswith("/depth_camera/"):
                 camera_part = topic.split("/")[2]
-                if camera_part == "downward" or camera_part == "upward" or camera_part == "forward":
+                if camera_part in DEPTH_CAMERA_POSITIONS:
                     camera_type = CameraType.DEPTH
                 else:
                     logger.warning(f"Unknown depth camera in topic: {topic}")
@@ -405,70 +486,287 @@ class CameraModule:
                     logger.warning(f"No depth image data in message")
                     return
                 
-                # Update camera state (we don't fully process depth images here)
+                # Update camera state
                 camera = self.cameras[camera_type]
-                camera["last_frame_time"] = timestamp
-                camera["frames_received"] += 1
+                camera.last_frame_time = timestamp
+                camera.frames_received += 1
+                
+                # Raw 16-bit depth images are converted to an RGB visualization
+                # so they can be captured like any other frame; other depth
+                # formats are only passed through to the callbacks. As with
+                # JPEG frames, only every Nth one is decoded while nobody reads
+                width = data.get("width")
+                height = data.get("height")
+                decode = not self.is_idle() or camera.frames_received % IDLE_DECODE_INTERVAL == 0
+                if data.get("encoding") in DEPTH16_ENCODINGS and width and height and decode:
+                    loop = asyncio.get_running_loop()
+                    camera.last_frame = await loop.run_in_executor(
+                        self.decode_pool, self.decode_depth_payload, image_data, width, height
+                    )
+                    camera.jpeg_cache = None
+                    camera.resolution = (width, height)
+                    self.notify_new_frame(camera_type)
                 
                 # Run frame callbacks for depth data
-                for callback in self.frame_callbacks:
-                    try:
-                        callback(camera_type, "depth", image_data, timestamp)
-                    except Exception as cb_error:
-                        logger.error(f"Error in frame callback: {cb_error}")
+                self.run_frame_callbacks(camera_type, "depth", image_data, timestamp)
         
         except json.JSONDecodeError:
             logger.error(f"Invalid JSON message: {message}")
         except Exception as e:
             logger.error(f"Error processing camera message: {e}")
+            if camera_type:
+                self.cameras[camera_type].errors += 1
+    
+    async def decode_worker(self):
+        """Decode queued JPEG frames off the event loop and publish them"""
+        loop = asyncio.get_running_loop()
+        
+        try:
+            while True:
+                camera_type, image_data, timestamp = await self.jpeg_queue.get()
+                
+                try:
+                    image = await loop.run_in_executor(self.decode_pool, self.decode_jpeg_payload, image_data)
+                    
+                    # Update camera state
+                    camera = self.cameras[camera_type]
+                    camera.last_frame = image
+                    camera.jpeg_cache = None
+                    camera.last_frame_time = timestamp
+                    camera.resolution = (image.shape[1], image.shape[0])
+                    self.notify_new_frame(camera_type)
+                    
+                    # Run frame callbacks
+                    self.run_frame_callbacks(camera_type, "jpeg", image, timestamp)
+                
+                except Exception as decode_error:
+                    logger.error(f"Error decoding JPEG data: {decode_error}")
+                    self.cameras[camera_type].errors += 1
+        except asyncio.CancelledError:
+            logger.info("Camera decode task cancelled")
+    
+    def decode_jpeg(self, jpeg_data: bytes) -> np.ndarray:
+        """Decode a JPEG frame to an HxWx3 RGB array, using libjpeg-turbo when available"""
+        if self.jpeg_codec:
+            return self.jpeg_codec.decode(jpeg_data, pixel_format=TJPF_RGB)
+        
+        # Fall back to PIL; converting to an array forces the decode here
+        return np.asarray(Image.open(io.BytesIO(jpeg_data)).convert("RGB"))
+    
+    def decode_depth_payload(self, image_data: str, width: int, height: int) -> np.ndarray:
+        """Decode a base64-encoded 16-bit depth image to an RGB visualization (runs on the decode pool)"""
+        depth = np.frombuffer(b64decode(image_data), dtype=np.uint16).reshape(height, width)
+        rgb = np.empty((height, width, 3), dtype=np.uint8)
+        depth16_to_rgb8(depth, DEPTH_MAX_RANGE, rgb)
+        rgb.setflags(write=False)
+        return rgb
+    
+    def encode_jpeg(self, frame: np.ndarray) -> bytes:
+        """Encode an RGB frame as JPEG, using libjpeg-turbo's fast DCT when available"""
+        if self.jpeg_codec:
+            return self.jpeg_codec.encode(
+                frame,
+                quality=JPEG_QUALITY,
+                pixel_format=TJPF_RGB,
+                jpeg_subsample=TJSAMP_420,
+                flags=TJFLAG_FASTDCT
+            )
+        
+        buffer = io.BytesIO()
+        Image.fromarray(frame).save(buffer, "JPEG", quality=JPEG_QUALITY)
+        return buffer.getvalue()
+    
+    def decode_jpeg_payload(self, image_data: str) -> np.ndarray:
+        """Decode a base64-encoded JPEG payload (runs on the decode pool)"""
+        frame = self.decode_jpeg(b64decode(image_data))
+        
+        # Stored frames are shared with every reader without copying, so
+        # make them immutable; anyone who wants to draw must copy first
+        frame.setflags(write=False)
+        return frame
+    
+    def update_fps(self, camera_type: CameraType):
+        """Update the FPS estimate after a frame is received"""
+        camera = self.cameras[camera_type]
+        current_time = time.time()
+        if camera.fps_window_start is None:
+            camera.fps_window_start = current_time
+            camera.fps_window_frames = 1
+        else:
+            frames = camera.fps_window_frames + 1
+            elapsed = current_time - camera.fps_window_start
+            
+            if elapsed >= 1.0:  # Calculate FPS every second
+                camera.fps = frames / elapsed
+                camera.fps_window_start = current_time
+                camera.fps_window_frames = 0
+            else:
+                camera.fps_window_frames = frames
+    
+    def is_idle(self) -> bool:
+        """Check whether no callback, waiter or recent caller is consuming frames"""
+        return (
+            not self.frame_callbacks
+            and not self.async_frame_callbacks
+            and not self.frame_waiters
+            and time.time() - self.last_consumer_time > CONSUMER_IDLE_TIMEOUT
+        )
+    
+    def notify_new_frame(self, camera_type: CameraType):
+        """Wake everything waiting for the next frame from the specified camera"""
+        event = self.frame_events[camera_type]
+        self.frame_events[camera_type] = asyncio.Event()
+        event.set()
+    
+    async def wait_for_frame(self, camera_type: CameraType, timeout: float) -> bool:
+        """Wait until a new frame arrives from the specified camera"""
+        self.frame_waiters += 1
+        try:
+            await asyncio.wait_for(self.frame_events[camera_type].wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.frame_waiters -= 1
     
-    def add_frame_callback(self, callback):
-        """Add a callback function to process camera frames"""
-        self.frame_callbacks.append(callback)
-        logger.info(f"Added frame callback: {callback.__name__}")
+    def add_frame_callback(self, callback, mode: str = "sync"):
+        """Add a callback function to process camera frames
+        
+        Callbacks are called as callback(camera_type, format, data, timestamp),
+        where data is the raw H264 bytes for "h264", an HxWx3 RGB numpy array
+        for "jpeg" and the raw payload for "depth".
+        
+        "sync" callbacks run inline on the event loop and should be cheap.
+        "async" callbacks (e.g. inference) run on a worker pool; frames are
+        dropped for them while MAX_CALLBACK_BACKLOG calls are still pending.
+        """
+        if mode == "async":
+            self.async_frame_callbacks.append(callback)
+        elif mode == "sync":
+            self.frame_callbacks.append(callback)
+        else:
+            raise ValueError(f"Unknown frame callback mode: {mode}")
+        logger.info(f"Added {mode} frame callback: {callback.__name__}")
     
     def remove_frame_callback(self, callback):
         """Remove a callback function"""
-        if callback in self.frame_callbacks:
-            self.frame_callbacks.remove(callback)
-            logger.info(f"Removed frame callback: {callback.__name__}")
+        for callbacks in (self.frame_callbacks, self.async_frame_callbacks):
+            if callback in callbacks:
+                callbacks.remove(callback)
+                logger.info(f"Removed frame callback: {callback.__name__}")
     
-    def capture_frame(self, camera_type: CameraType, save_to_file: bool = False) -> Optional[Union[Image.Image, bytes]]:
-        """Capture a single frame from the specified camera"""
+    def run_frame_callbacks(self, camera_type: CameraType, format: str, data: Any, timestamp: Any):
+        """Run sync callbacks inline and hand async callbacks to the callback pool"""
+        for callback in self.frame_callbacks:
+            try:
+                callback(camera_type, format, data, timestamp)
+            except Exception as cb_error:
+                logger.error(f"Error in frame callback: {cb_error}")
+        
+        if not self.async_frame_callbacks:
+            return
+        
+        loop = asyncio.get_running_loop()
+        for callback in self.async_frame_callbacks:
+            # Drop the frame for slow consumers instead of queueing behind them
+            if self.async_callbacks_pending >= MAX_CALLBACK_BACKLOG:
+                break
+            
+            self.async_callbacks_pending += 1
+            future = loop.run_in_executor(self.callback_pool, callback, camera_type, format, data, timestamp)
+            future.add_done_callback(self.on_async_callback_done)
+    
+    def on_async_callback_done(self, future: asyncio.Future):
+        """Account for a finished async callback and log its failure, if any"""
+        self.async_callbacks_pending -= 1
+        if not future.cancelled() and future.exception():
+            logger.error(f"Error in frame callback: {future.exception()}")
+    
+    def capture_frame(self, camera_type: CameraType, save_to_file: bool = False) -> Optional[np.ndarray]:
+        """Capture a single frame from the specified camera
+        
+        The returned array is the stored frame itself (read-only, no copy);
+        call .copy() on it before modifying it.
+        """
         camera = self.cameras[camera_type]
+        self.last_consumer_time = time.time()
         
-        if camera["state"] != CameraState.STREAMING:
+        if camera.state != CameraState.STREAMING:
             logger.warning(f"Camera {camera_type.value} is not streaming")
             return None
         
         # Return the most recent frame
-        if camera["last_frame"] is not None:
-            frame = camera["last_frame"]
+        if camera.last_frame is not None:
+            frame = camera.last_frame
             
             # Save to file if requested
             if save_to_file:
-                timestamp = int(time.time())
-                filename = f"{camera_type.value}_frame_{timestamp}.jpg"
-                filepath = os.path.join(self.frame_storage_path, filename)
-                
-                frame.save(filepath, "JPEG")
-                logger.info(f"Saved frame to {filepath}")
+                self.save_frame(camera_type, frame)
             
             return frame
         else:
             logger.warning(f"No frame available for {camera_type.value} camera")
             return None
     
+    async def capture_frame_async(self, camera_type: CameraType, save_to_file: bool = False) -> Optional[np.ndarray]:
+        """Capture a single frame, encoding and writing any file off the event loop"""
+        frame = self.capture_frame(camera_type)
+        
+        if frame is not None and save_to_file:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.save_frame, camera_type, frame)
+        
+        return frame
+    
+    def save_frame(self, camera_type: CameraType, frame: np.ndarray) -> str:
+        """Save a frame to the frame storage directory as JPEG"""
+        timestamp = int(time.time())
+        filename = f"{camera_type.value}_frame_{timestamp}.jpg"
+        filepath = os.path.join(self.frame_storage_path, filename)
+        
+        with open(filepath, "wb") as f:
+            f.write(self.encode_frame_cached(camera_type, frame))
+        logger.info(f"Saved frame to {filepath}")
+        return filepath
+    
+    def get_jpeg_frame(self, camera_type: CameraType) -> Optional[bytes]:
+        """Get the most recent frame as JPEG bytes"""
+        frame = self.capture_frame(camera_type)
+        if frame is None:
+            return None
+        return self.encode_frame_cached(camera_type, frame)
+    
+    def encode_frame_cached(self, camera_type: CameraType, frame: np.ndarray) -> bytes:
+        """Encode a frame as JPEG, reusing the bytes if this frame was already encoded"""
+        camera = self.cameras[camera_type]
+        
+        # Compare by identity: every decoded frame is a new array, and the
+        # check stays correct if a new frame lands while encoding on a thread
+        cached = camera.jpeg_cache
+        if cached and cached[0] is frame:
+            return cached[1]
+        
+        jpeg_data = self.encode_jpeg(frame)
+        camera.jpeg_cache = (frame, jpeg_data)
+        return jpeg_data
+    
+    def ensure_dir(self, path: str):
+        """Create a directory once; later calls skip the filesystem check"""
+        if path not in self.created_dirs:
+            os.makedirs(path, exist_ok=True)
+            self.created_dirs.add(path)
+    
     def get_annotated_frame(self, camera_type: CameraType, annotations: Dict[str, Any] = None) -> Optional[Image.Image]:
         """Get the most recent frame with annotations"""
         camera = self.cameras[camera_type]
+        self.last_consumer_time = time.time()
         
-        if camera["state"] != CameraState.STREAMING or camera["last_frame"] is None:
+        if camera.state != CameraState.STREAMING or camera.last_frame is None:
             logger.warning(f"No frame available for {camera_type.value} camera")
             return None
         
-        # Create a copy of the frame for annotation
-        frame = camera["last_frame"].copy()
+        # Create a PIL copy of the frame for annotation
+        frame = Image.fromarray(camera.last_frame)
         
         # If no annotations, return the original frame
         if not annotations:
@@ -477,66 +775,103 @@ class CameraModule:
         try:
             draw = ImageDraw.Draw(frame)
             
-            # Add timestamp
-            if "timestamp" in annotations and annotations["timestamp"]:
-                timestamp = camera["last_frame_time"]
-                if timestamp:
-                    timestamp_str = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
-                    draw.text((10, 10), timestamp_str, fill=(255, 255, 255))
-            
-            # Add FPS counter
-            if "fps" in annotations and annotations["fps"]:
-                fps = camera["fps"]
-                draw.text((10, 30), f"FPS: {fps:.1f}", fill=(255, 255, 255))
-            
-            # Add bounding boxes
-            if "boxes" in annotations and annotations["boxes"]:
-                for box in annotations["boxes"]:
-                    x1, y1, x2, y2 = box["coords"]
-                    label = box.get("label", "")
-                    confidence = box.get("confidence", 1.0)
-                    
-                    # Draw box
-                    draw.rectangle((x1, y1, x2, y2), outline=(0, 255, 0), width=2)
-                    
-                    # Draw label
-                    if label:
-                        draw.text((x1, y1 - 15), f"{label} {confidence:.2f}", fill=(0, 255, 0))
-            
-            # Add custom text annotations
-            if "text" in annotations and annotations["text"]:
-                for text_item in annotations["text"]:
-                    text = text_item["text"]
-                    position = text_item.get("position", (10, 50))
-                    color = text_item.get("color", (255, 255, 255))
-                    
-                    draw.text(position, text, fill=color)
+            for key, drawer in self.annotation_drawers:
+                value = annotations.get(key)
+                if value:
+                    drawer(draw, camera, value)
             
             return frame
             
         except Exception as e:
             logger.error(f"Error adding annotations to frame: {e}")
-            return camera["last_frame"]
+            return Image.fromarray(camera.last_frame)
+    
+    def draw_timestamp(self, draw: ImageDraw.ImageDraw, camera: CameraSlot, enabled: bool):
+        """Draw the frame timestamp"""
+        timestamp = camera.last_frame_time
+        if timestamp:
+            timestamp_str = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+            draw.text((10, 10), timestamp_str, fill=TEXT_COLOR, font=DEFAULT_FONT)
+    
+    def draw_fps(self, draw: ImageDraw.ImageDraw, camera: CameraSlot, enabled: bool):
+        """Draw the FPS counter"""
+        draw.text((10, 30), f"FPS: {camera.fps:.1f}", fill=TEXT_COLOR, font=DEFAULT_FONT)
+    
+    def draw_boxes(self, draw: ImageDraw.ImageDraw, camera: CameraSlot, boxes: List[Dict[str, Any]]):
+        """Draw labelled bounding boxes"""
+        for box in boxes:
+            x1, y1, x2, y2 = box["coords"]
+            label = box.get("label", "")
+            
+            draw.rectangle((x1, y1, x2, y2), outline=BOX_COLOR, width=2)
+            
+            if label:
+                confidence = box.get("confidence", 1.0)
+                draw.text((x1, y1 - 15), f"{label} {confidence:.2f}", fill=BOX_COLOR, font=DEFAULT_FONT)
+    
+    def draw_text(self, draw: ImageDraw.ImageDraw, camera: CameraSlot, text_items: List[Dict[str, Any]]):
+        """Draw custom text annotations"""
+        for text_item in text_items:
+            position = text_item.get("position", (10, 50))
+            color = text_item.get("color", TEXT_COLOR)
+            draw.text(position, text_item["text"], fill=color, font=DEFAULT_FONT)
     
     def get_camera_status(self, camera_type: CameraType) -> Dict[str, Any]:
         """Get the status of the specified camera"""
         camera = self.cameras[camera_type]
         
         return {
-            "state": camera["state"].value,
-            "format": camera["stream_format"].value,
-            "resolution": camera["resolution"],
-            "fps": camera["fps"],
-            "frames_received": camera["frames_received"],
-            "errors": camera["errors"],
-            "last_frame_time": camera["last_frame_time"]
+            "state": camera.state.value,
+            "format": camera.stream_format.value,
+            "resolution": camera.resolution,
+            "fps": camera.fps,
+            "frames_received": camera.frames_received,
+            "errors": camera.errors,
+            "last_frame_time": camera.last_frame_time
         }
     
+    async def run_ffmpeg(self, args: List[str], timeout: float = None) -> Tuple[int, bytes]:
+        """Run ffmpeg without blocking the event loop, returning its exit code and error output"""
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-hide_banner", "-loglevel", "error", *args,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            _, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except BaseException:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+        return process.returncode, stderr
+    
+    async def get_video_encoder(self) -> str:
+        """Get the ffmpeg H264 encoder, preferring NVENC when the GPU supports it"""
+        if self.video_encoder:
+            return self.video_encoder
+        
+        # Stock ffmpeg builds list h264_nvenc even without NVIDIA hardware, so
+        # encode a single test frame instead of trusting the encoder list
+        self.video_encoder = "libx264"
+        try:
+            returncode, _ = await self.run_ffmpeg([
+                "-f", "lavfi", "-i", "color=size=256x256",
+                "-frames:v", "1", "-c:v", "h264_nvenc", "-f", "null", "-"
+            ], timeout=10)
+            if returncode == 0:
+                self.video_encoder = "h264_nvenc"
+        except Exception as e:
+            logger.warning(f"Could not probe ffmpeg for NVENC support: {e}")
+        
+        logger.info(f"Using {self.video_encoder} for video encoding")
+        return self.video_encoder
+    
     async def capture_video(self, camera_type: CameraType, duration: int, filename: str = None) -> bool:
         """Capture a video of specified duration from the camera"""
         camera = self.cameras[camera_type]
         
-        if camera["state"] != CameraState.STREAMING:
+        if camera.state != CameraState.STREAMING:
             logger.warning(f"Camera {camera_type.value} is not streaming")
             return False
         
@@ -553,13 +888,19 @@ class CameraModule:
         try:
             # For simplicity, we'll just save frames and compile them later
             frames = []
-            start_time = time.time()
+            end_time = time.time() + duration
             
-            while time.time() - start_time < duration:
-                if camera["last_frame"] is not None:
-                    frames.append(camera["last_frame"].copy())
+            # Wake on each new frame instead of polling at the estimated FPS,
+            # so every frame is recorded exactly once
+            while True:
+                remaining = end_time - time.time()
+                if remaining <= 0 or not await self.wait_for_frame(camera_type, remaining):
+                    break
                 
-                await asyncio.sleep(1.0 / max(1, camera["fps"]))
+                # Each decoded frame is a new array that is published by swapping
+                # the last_frame reference, never drawn on in place, so holding a
+                # reference is safe without copying the pixels
+                frames.append(camera.last_frame)
             
             if not frames:
                 logger.warning(f"No frames captured during video recording")
@@ -569,24 +910,34 @@ class CameraModule:
             try:
                 # Save frames as temporary images
                 temp_dir = os.path.join(self.frame_storage_path, "temp")
-                os.makedirs(temp_dir, exist_ok=True)
+                self.ensure_dir(temp_dir)
                 
                 for i, frame in enumerate(frames):
                     frame_path = os.path.join(temp_dir, f"frame_{i:05d}.jpg")
-                    frame.save(frame_path, "JPEG")
+                    with open(frame_path, "wb") as f:
+                        f.write(self.encode_jpeg(frame))
                 
                 # Use ffmpeg to create video
-                ffmpeg_cmd = [
-                    "ffmpeg",
+                input_args = [
                     "-y",  # Overwrite output file if it exists
-                    "-framerate", str(camera["fps"]),
-                    "-i", os.path.join(temp_dir, "frame_%05d.jpg"),
-                    "-c:v", "libx264",
-                    "-pix_fmt", "yuv420p",
-                    filepath
+                    "-framerate", str(camera.fps),
+                    "-i", os.path.join(temp_dir, "frame_%05d.jpg")
                 ]
+                output_args = ["-pix_fmt", "yuv420p", filepath]
                 
-                subprocess.run(ffmpeg_cmd, check=True)
+                encoder = await self.get_video_encoder()
+                returncode, stderr = await self.run_ffmpeg(input_args + ["-c:v", encoder] + output_args)
+                
+                # NVENC can still fail at run time (e.g. no free encoder sessions);
+                # fall back to the software encoder for this and later videos
+                if returncode and encoder != "libx264":
+                    logger.warning(f"{encoder} encoding failed, retrying with libx264")
+                    self.video_encoder = "libx264"
+                    returncode, stderr = await self.run_ffmpeg(input_args + ["-c:v", "libx264"] + output_args)
+                
+                if returncode:
+                    logger.error(f"FFmpeg error: {stderr.decode(errors='replace').strip()}")
+                    return False
                 
                 # Clean up temporary files
                 for i in range(len(frames)):
@@ -595,9 +946,6 @@ class CameraModule:
                 logger.info(f"Video saved to {filepath}")
                 return True
                 
-            except subprocess.CalledProcessError as e:
-                logger.error(f"FFmpeg error: {e}")
-                return False
             except Exception as e:
                 logger.error(f"Error creating video: {e}")
                 return False
@@ -610,7 +958,7 @@ class CameraModule:
         """Close the connection to the robot"""
         # Stop all active streams
         for camera_type in CameraType:
-            if self.cameras[camera_type]["state"] == CameraState.STREAMING:
+            if self.cameras[camera_type].state == CameraState.STREAMING:
                 await self.stop_camera_stream(camera_type)
         
         # Close WebSocket connection
@@ -618,6 +966,12 @@ class CameraModule:
             await self.ws.close()
             logger.info("WebSocket connection closed")
         
+        # Stop the decode workers
+        if self.decode_task:
+            self.decode_task.cancel()
+        self.decode_pool.shutdown(wait=False)
+        self.callback_pool.shutdown(wait=False)
+        
         logger.info("Camera Module closed")
 
 
@@ -662,4 +1016,8 @@ async def main():
 
 
 if __name__ == "__main__":
+    # Use the libuv-based loop when installed; it cuts scheduling overhead for
+    # the decode/callback executor handoffs on every frame
+    if UVLOOP_AVAILABLE:
+        uvloop.install()
     asyncio.run(main())
\ No newline at end of file
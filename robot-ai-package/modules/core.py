@@ -16,27 +16,87 @@ Version: 1.0.0
 """
 
 import asyncio
+import atexit
 import base64
+import functools
+import inspect
 import json
 import logging
 import os
+import queue
 import signal
 import sys
 import time
 import uuid
 from enum import Enum
-from typing import Dict, List, Optional, Tuple, Union, Any
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Dict, List, Optional, Tuple, Union, Any
 import websockets
 import requests
 from datetime import datetime
 
-# Configure logging
+# Try to import orjson for faster JSON parsing and serialization
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+if ORJSON_AVAILABLE:
+    json_loads = orjson.loads
+
+    def json_dumps(obj: Any) -> str:
+        """Serialize obj to a JSON text frame"""
+        return orjson.dumps(obj).decode('utf-8')
+else:
+    json_loads = json.loads
+    json_dumps = json.dumps
+
+# Try to import aiohttp for non-blocking keep-alive HTTP requests
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+# Try to import uvloop for a faster event loop
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+# Messages at least this long (map grids, camera frames) are parsed off the event loop
+OFFLOAD_PARSE_SIZE = 64 * 1024
+
+# Largest WebSocket message accepted (map grids exceed the 1 MiB library default)
+WS_MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+# Number of received messages buffered before the robot's sends are backpressured
+WS_MAX_QUEUE = 64
+
+@functools.lru_cache(maxsize=64)
+def topic_frame(op: str, topics: Tuple[str, ...]) -> str:
+    """Serialized enable/disable topic frame, cached since the same sets recur on every reconnect"""
+    return json_dumps({op: list(topics)})
+
+def ws_closed(ws) -> bool:
+    """Whether a WebSocket is missing or closed, on both the legacy and current websockets APIs"""
+    return ws is None or ws.state.name == "CLOSED"
+
+# Configure logging; the log file is written from a background thread so
+# that disk writes never block the event loop
+log_queue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, logging.FileHandler('robot-ai.log'))
+log_listener.start()
+atexit.register(log_listener.stop)
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler(sys.stdout),
-        logging.FileHandler('robot-ai.log')
+        QueueHandler(log_queue)
     ]
 )
 logger = logging.getLogger('robot-ai')
@@ -55,14 +115,50 @@ class RobotState(Enum):
     ENTERING_ELEVATOR = "entering_elevator"
     EXITING_ELEVATOR = "exiting_elevator"
 
+class Pose:
+    """Latest robot pose, updated in place on every /tracked_pose message"""
+    
+    __slots__ = ("x", "y", "ori")
+    
+    def __init__(self, x: float = 0, y: float = 0, ori: float = 0):
+        self.x = x
+        self.y = y
+        self.ori = ori
+    
+    def to_dict(self) -> Dict:
+        """Pose in the robot's {"pos": [x, y], "ori": ori} message format"""
+        return {"pos": [self.x, self.y], "ori": self.ori}
+
+class ApiResponse:
+    """Buffered response from the robot HTTP API"""
+    
+    __slots__ = ("status_code", "reason", "content")
+    
+    def __init__(self, status_code: int, reason: Optional[str], content: bytes):
+        self.status_code = status_code
+        self.reason = reason
+        self.content = content
+    
+    @property
+    def text(self) -> str:
+        """Response body decoded as text"""
+        return self.content.decode("utf-8", errors="replace")
+    
+    def json(self) -> Any:
+        """Response body parsed as JSON"""
+        return json_loads(self.content)
+
 class RobotAI:
     """Main Robot AI class that manages all robot functionality"""
     
-    def __init__(self, robot_ip: str, robot_port: int = 8090, use_ssl: bool = False):
+    def __init__(self, robot_ip: str, robot_port: int = 8090, use_ssl: bool = False, camera_video: bool = True):
         """Initialize the Robot AI with connection details"""
         self.robot_ip = robot_ip
         self.robot_port = robot_port
         self.use_ssl = use_ssl
+        # Subscribe to the front camera video topic; set False when the camera
+        # module already streams video on its own connection
+        self.camera_video = camera_video
         self.protocol = "https" if use_ssl else "http"
         self.ws_protocol = "wss" if use_ssl else "ws"
         self.base_url = f"{self.protocol}://{self.robot_ip}:{self.robot_port}"
@@ -70,8 +166,8 @@ class RobotAI:
         
         # Robot state
         self.state = RobotState.IDLE
-        self.current_pose = {"pos": [0, 0], "ori": 0}
-        self.battery_state = {"percentage": 0, "power_supply_status": "unknown"}
+        self.pose = Pose()
+        self.battery_state = {"percentage": 0, "power_supply_status": "unknown", "voltage": 0, "current": 0}
         self.current_map_id = None
         self.current_map_data = None
         self.point_cloud = []
@@ -83,11 +179,29 @@ class RobotAI:
         # WebSocket connection
         self.ws = None
         self.topics_enabled = []
+        self.pending_topics = {"enable_topic": [], "disable_topic": []}
+        self.topic_flush = None
+        self.disconnected = asyncio.Event()
+        self.recv_raw = False  # Whether ws.recv() can hand back undecoded bytes
+        
+        # HTTP session, created on first request and reused for keep-alive
+        self.http = None
         
         # IoT integrations
         self.registered_doors = {}  # {door_id: {"mac": mac_address, "polygon": [...], "status": "closed"}}
         self.registered_elevators = {}  # {elevator_id: {"mac": mac_address, "floors": [...], "status": "idle"}}
         
+        # Topic handlers used by process_message
+        self.topic_handlers = {
+            "/tracked_pose": self.handle_tracked_pose,
+            "/battery_state": self.handle_battery_state,
+            "/map": self.handle_map,
+            "/scan_matched_points2": self.handle_point_cloud,
+            "/rgb_cameras/front/video": self.handle_camera_video,
+            "/planning_state": self.handle_planning_state,
+            "/jack_state": self.handle_jack_state
+        }
+        
         logger.info(f"Robot AI initialized for robot at {self.base_url}")
         
     async def connect(self):
@@ -95,12 +209,22 @@ class RobotAI:
         logger.info(f"Connecting to robot at {self.ws_url}")
         
         try:
-            self.ws = await websockets.connect(self.ws_url)
+            self.ws = await websockets.connect(
+                self.ws_url,
+                max_size=WS_MAX_MESSAGE_SIZE,
+                max_queue=WS_MAX_QUEUE,
+                compression=None,
+                ping_interval=20,
+                ping_timeout=20
+            )
+            self.recv_raw = "decode" in inspect.signature(self.ws.recv).parameters
+            # A new connection starts with no topics subscribed
+            self.topics_enabled = []
             self.connection_status["connected"] = True
             self.connection_status["last_heartbeat"] = time.time()
             
             # Enable essential topics
-            await self.enable_topics([
+            topics = [
                 "/tracked_pose",
                 "/battery_state",
                 "/map",
@@ -111,7 +235,10 @@ class RobotAI:
                 "/planning_state",
                 "/alerts",
                 "/jack_state"
-            ])
+            ]
+            if not self.camera_video:
+                topics.remove("/rgb_cameras/front/video")
+            await self.enable_topics(topics)
             
             logger.info("Successfully connected to robot")
             return True
@@ -125,7 +252,7 @@ class RobotAI:
         logger.info("Attempting to reconnect to robot...")
         
         try:
-            if self.ws and not self.ws.closed:
+            if not ws_closed(self.ws):
                 await self.ws.close()
                 
             return await self.connect()
@@ -135,41 +262,68 @@ class RobotAI:
     
     async def enable_topics(self, topics: List[str]):
         """Enable specified topics for real-time updates"""
-        if not self.ws or self.ws.closed:
+        if ws_closed(self.ws):
             logger.error("Cannot enable topics: WebSocket connection not established")
             return False
         
-        try:
-            message = {"enable_topic": topics}
-            await self.ws.send(json.dumps(message))
-            self.topics_enabled.extend(topics)
-            logger.info(f"Enabled topics: {topics}")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to enable topics: {e}")
-            return False
+        return await self.queue_topic_change("enable_topic", topics)
     
     async def disable_topics(self, topics: List[str]):
         """Disable specified topics"""
-        if not self.ws or self.ws.closed:
+        if ws_closed(self.ws):
             logger.error("Cannot disable topics: WebSocket connection not established")
             return False
         
-        try:
-            message = {"disable_topic": topics}
-            await self.ws.send(json.dumps(message))
+        return await self.queue_topic_change("disable_topic", topics)
+    
+    async def queue_topic_change(self, op: str, topics: List[str]) -> bool:
+        """Queue a topic change to be sent with others made in the same loop iteration"""
+        other = self.pending_topics["disable_topic" if op == "enable_topic" else "enable_topic"]
+        pending = self.pending_topics[op]
+        for topic in topics:
+            # The most recent request for a topic wins
+            if topic in other:
+                other.remove(topic)
+            if topic not in pending:
+                pending.append(topic)
+        
+        if self.topic_flush is None:
+            self.topic_flush = asyncio.ensure_future(self.flush_topic_changes())
+        return await asyncio.shield(self.topic_flush)
+    
+    async def flush_topic_changes(self) -> bool:
+        """Send queued topic changes as one frame per operation"""
+        # Let every caller in this loop iteration queue its topics first
+        await asyncio.sleep(0)
+        pending = self.pending_topics
+        self.pending_topics = {"enable_topic": [], "disable_topic": []}
+        self.topic_flush = None
+        
+        success = True
+        for op, topics in pending.items():
+            # Drop topics already in the requested state so no-op frames are never sent
+            enable = op == "enable_topic"
+            topics = [topic for topic in topics if (topic in self.topics_enabled) != enable]
+            if not topics:
+                continue
+            try:
+                await self.ws.send(topic_frame(op, tuple(topics)))
+            except Exception as e:
+                logger.error(f"Failed to {op.split('_')[0]} topics: {e}")
+                success = False
+                continue
+            
             for topic in topics:
-                if topic in self.topics_enabled:
+                if enable:
+                    self.topics_enabled.append(topic)
+                else:
                     self.topics_enabled.remove(topic)
-            logger.info(f"Disabled topics: {topics}")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to disable topics: {e}")
-            return False
+            logger.info(f"{op.split('_')[0].capitalize()}d topics: {topics}")
+        return success
     
     async def listen_for_updates(self):
         """Listen for updates from the robot via WebSocket"""
-        if not self.ws or self.ws.closed:
+        if ws_closed(self.ws):
             logger.error("Cannot listen for updates: WebSocket connection not established")
             return
         
@@ -178,7 +332,11 @@ class RobotAI:
         try:
             while True:
                 try:
-                    message = await self.ws.recv()
+                    # Skip the str decode where supported; JSON parses bytes directly
+                    if self.recv_raw:
+                        message = await self.ws.recv(decode=False)
+                    else:
+                        message = await self.ws.recv()
                     await self.process_message(message)
                 except websockets.exceptions.ConnectionClosed:
                     logger.warning("WebSocket connection closed")
@@ -194,67 +352,24 @@ class RobotAI:
         except Exception as e:
             logger.error(f"Unexpected error in listen_for_updates: {e}")
     
-    async def process_message(self, message: str):
+    async def process_message(self, message: Union[str, bytes]):
         """Process incoming WebSocket messages"""
         try:
-            data = json.loads(message)
+            if len(message) >= OFFLOAD_PARSE_SIZE:
+                loop = asyncio.get_running_loop()
+                data = await loop.run_in_executor(None, json_loads, message)
+            else:
+                data = json_loads(message)
             topic = data.get("topic")
             
             if not topic:
-                logger.debug(f"Received non-topic message: {data}")
+                logger.debug("Received non-topic message: %s", data)
                 return
             
             # Update internal state based on topic
-            if topic == "/tracked_pose":
-                self.current_pose = {"pos": data.get("pos", [0, 0]), "ori": data.get("ori", 0)}
-                
-            elif topic == "/battery_state":
-                self.battery_state = {
-                    "percentage": data.get("percentage", 0),
-                    "power_supply_status": data.get("power_supply_status", "unknown"),
-                    "voltage": data.get("voltage", 0),
-                    "current": data.get("current", 0)
-                }
-                
-            elif topic == "/map":
-                # Store minimal map data to avoid excessive memory usage
-                self.current_map_data = {
-                    "resolution": data.get("resolution"),
-                    "size": data.get("size"),
-                    "origin": data.get("origin"),
-                    "stamp": data.get("stamp")
-                }
-                # Don't store the full data array here as it can be very large
-                
-            elif topic == "/scan_matched_points2":
-                self.point_cloud = data.get("points", [])
-                
-            elif topic == "/rgb_cameras/front/video":
-                # Store reference to camera data, not the full data
-                self.camera_feed = {
-                    "stamp": data.get("stamp"),
-                    "available": True
-                }
-                
-            elif topic == "/planning_state":
-                move_state = data.get("move_state")
-                if move_state == "moving":
-                    self.state = RobotState.MOVING
-                elif move_state == "succeeded":
-                    self.state = RobotState.IDLE
-                elif move_state == "failed":
-                    self.state = RobotState.ERROR
-                    logger.error(f"Move action failed: {data.get('fail_reason_str')}")
-                
-            elif topic == "/jack_state":
-                jack_state = data.get("state")
-                progress = data.get("progress", 0)
-                if jack_state == "jacking_up":
-                    self.state = RobotState.JACKING_UP
-                elif jack_state == "jacking_down":
-                    self.state = RobotState.JACKING_DOWN
-                
-            # Add more topic handling as needed
+            handler = self.topic_handlers.get(topic)
+            if handler:
+                handler(data)
             
             # Update connection status
             self.connection_status["last_heartbeat"] = time.time()
@@ -264,11 +379,103 @@ class RobotAI:
         except Exception as e:
             logger.error(f"Error processing message: {e}")
     
+    def add_topic_handler(self, topic: str, handler: Callable[[Dict], None]):
+        """Register a handler for a topic, replacing any existing one"""
+        self.topic_handlers[topic] = handler
+    
+    def remove_topic_handler(self, topic: str):
+        """Stop handling a topic"""
+        self.topic_handlers.pop(topic, None)
+    
+    @property
+    def current_pose(self) -> Dict:
+        """Current pose as a dict, built on demand for status reporting"""
+        return self.pose.to_dict()
+    
+    async def http_request(self, method: str, url: str, json: Optional[Dict] = None) -> ApiResponse:
+        """Send a request to the robot HTTP API over a persistent session"""
+        if AIOHTTP_AVAILABLE:
+            if self.http is None:
+                self.http = aiohttp.ClientSession(json_serialize=json_dumps)
+            async with self.http.request(method, url, json=json) as response:
+                return ApiResponse(response.status, response.reason, await response.read())
+        
+        # Fall back to a requests session on a worker thread
+        if self.http is None:
+            self.http = requests.Session()
+        response = await asyncio.to_thread(self.http.request, method, url, json=json)
+        return ApiResponse(response.status_code, response.reason, response.content)
+    
+    def handle_tracked_pose(self, data: Dict):
+        """Update the current pose from a /tracked_pose message"""
+        pose = self.pose
+        pos = data.get("pos") or (0, 0)
+        pose.x = pos[0]
+        pose.y = pos[1]
+        pose.ori = data.get("ori", 0)
+    
+    def handle_battery_state(self, data: Dict):
+        """Update the battery state from a /battery_state message"""
+        battery = self.battery_state
+        try:
+            battery["percentage"] = data["percentage"]
+            battery["power_supply_status"] = data["power_supply_status"]
+            battery["voltage"] = data["voltage"]
+            battery["current"] = data["current"]
+        except KeyError:
+            # Partial frame, fill the missing fields with defaults
+            battery["percentage"] = data.get("percentage", 0)
+            battery["power_supply_status"] = data.get("power_supply_status", "unknown")
+            battery["voltage"] = data.get("voltage", 0)
+            battery["current"] = data.get("current", 0)
+    
+    def handle_map(self, data: Dict):
+        """Store map metadata from a /map message"""
+        # Store minimal map data to avoid excessive memory usage
+        self.current_map_data = {
+            "resolution": data.get("resolution"),
+            "size": data.get("size"),
+            "origin": data.get("origin"),
+            "stamp": data.get("stamp")
+        }
+        # Don't store the full data array here as it can be very large
+    
+    def handle_point_cloud(self, data: Dict):
+        """Update the point cloud from a /scan_matched_points2 message"""
+        self.point_cloud = data.get("points", [])
+    
+    def handle_camera_video(self, data: Dict):
+        """Record camera availability from a /rgb_cameras/front/video message"""
+        # Store reference to camera data, not the full data
+        self.camera_feed = {
+            "stamp": data.get("stamp"),
+            "available": True
+        }
+    
+    def handle_planning_state(self, data: Dict):
+        """Update the robot state from a /planning_state message"""
+        move_state = data.get("move_state")
+        if move_state == "moving":
+            self.state = RobotState.MOVING
+        elif move_state == "succeeded":
+            self.state = RobotState.IDLE
+        elif move_state == "failed":
+            self.state = RobotState.ERROR
+            logger.error(f"Move action failed: {data.get('fail_reason_str')}")
+    
+    def handle_jack_state(self, data: Dict):
+        """Update the robot state from a /jack_state message"""
+        jack_state = data.get("state")
+        if jack_state == "jacking_up":
+            self.state = RobotState.JACKING_UP
+        elif jack_state == "jacking_down":
+            self.state = RobotState.JACKING_DOWN
+    
     async def set_current_map(self, map_id: int) -> bool:
         """Set the current map on the robot"""
         try:
             url = f"{self.base_url}/chassis/current-map"
-            response = requests.post(url, json={"map_id": map_id})
+            response = await self.http_request("POST", url, json={"map_id": map_id})
             
             if response.status_code == 200:
                 self.current_map_id = map_id
@@ -292,7 +499,7 @@ class RobotAI:
                 "adjust_position": adjust_position
             }
             
-            response = requests.post(url, json=payload)
+            response = await self.http_request("POST", url, json=payload)
             
             if response.status_code == 200:
                 logger.info(f"Successfully set pose to ({x}, {y}, {orientation})")
@@ -309,7 +516,7 @@ class RobotAI:
         """Get a list of available maps"""
         try:
             url = f"{self.base_url}/maps/"
-            response = requests.get(url)
+            response = await self.http_request("GET", url)
             
             if response.status_code == 200:
                 maps = response.json()
@@ -342,7 +549,7 @@ class RobotAI:
             if target_ori is not None:
                 payload["target_ori"] = target_ori
                 
-            response = requests.post(url, json=payload)
+            response = await self.http_request("POST", url, json=payload)
             
             if response.status_code == 200:
                 result = response.json()
@@ -371,7 +578,7 @@ class RobotAI:
         """Cancel the current move action"""
         try:
             url = f"{self.base_url}/chassis/moves/current"
-            response = requests.patch(url, json={"state": "cancelled"})
+            response = await self.http_request("PATCH", url, json={"state": "cancelled"})
             
             if response.status_code == 200:
                 logger.info("Successfully cancelled current move")
@@ -390,7 +597,7 @@ class RobotAI:
             url = f"{self.base_url}/mappings/"
             payload = {"continue_mapping": continue_mapping}
             
-            response = requests.post(url, json=payload)
+            response = await self.http_request("POST", url, json=payload)
             
             if response.status_code == 200:
                 result = response.json()
@@ -414,7 +621,7 @@ class RobotAI:
         try:
             # Finish mapping
             url = f"{self.base_url}/mappings/current"
-            finish_response = requests.patch(url, json={"state": "finished"})
+            finish_response = await self.http_request("PATCH", url, json={"state": "finished"})
             
             if finish_response.status_code != 200:
                 logger.error(f"Failed to finish mapping: {finish_response.status_code} {finish_response.text}")
@@ -434,7 +641,7 @@ class RobotAI:
                     "mapping_id": mapping_id
                 }
                 
-                save_response = requests.post(save_url, json=save_payload)
+                save_response = await self.http_request("POST", save_url, json=save_payload)
                 
                 if save_response.status_code == 200:
                     map_result = save_response.json()
@@ -462,7 +669,7 @@ class RobotAI:
         """Jack up the robot to lift a cargo"""
         try:
             url = f"{self.base_url}/services/jack_up"
-            response = requests.post(url)
+            response = await self.http_request("POST", url)
             
             if response.status_code == 200:
                 logger.info("Successfully initiated jack up operation")
@@ -480,7 +687,7 @@ class RobotAI:
         """Jack down the robot to release a cargo"""
         try:
             url = f"{self.base_url}/services/jack_down"
-            response = requests.post(url)
+            response = await self.http_request("POST", url)
             
             if response.status_code == 200:
                 logger.info("Successfully initiated jack down operation")
@@ -530,7 +737,7 @@ class RobotAI:
                 "detour_tolerance": detour_tolerance
             }
                 
-            response = requests.post(url, json=payload)
+            response = await self.http_request("POST", url, json=payload)
             
             if response.status_code == 200:
                 result = response.json()
@@ -687,7 +894,7 @@ class RobotAI:
         """Get the latest camera frame"""
         try:
             url = f"{self.base_url}/rgb_cameras/{camera}/compressed"
-            response = requests.get(url)
+            response = await self.http_request("GET", url)
             
             if response.status_code == 200:
                 image_data = response.content
@@ -797,10 +1004,19 @@ class RobotAI:
     
     async def close(self):
         """Close the connection to the robot"""
-        if self.ws and not self.ws.closed:
+        if not ws_closed(self.ws):
             await self.ws.close()
             logger.info("WebSocket connection closed")
         
+        if self.http is not None:
+            if AIOHTTP_AVAILABLE:
+                await self.http.close()
+            else:
+                self.http.close()
+            self.http = None
+        
+        self.connection_status["connected"] = False
+        self.disconnected.set()
         logger.info("Robot AI connection closed")
 
 
@@ -814,13 +1030,18 @@ async def main():
     robot = RobotAI(robot_ip=robot_ip, robot_port=robot_port)
     
     # Set up clean shutdown
-    def handle_shutdown(sig=None, frame=None):
+    def handle_shutdown():
         logger.info("Shutdown signal received")
-        asyncio.create_task(robot.close())
-        sys.exit(0)
+        robot.disconnected.set()
     
-    signal.signal(signal.SIGINT, handle_shutdown)
-    signal.signal(signal.SIGTERM, handle_shutdown)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, handle_shutdown)
+        except NotImplementedError:
+            # Event loops without signal support (e.g. on Windows) get a plain
+            # handler that hands the shutdown back to the loop thread
+            signal.signal(sig, lambda signum, frame: loop.call_soon_threadsafe(handle_shutdown))
     
     # Connect to robot
     connected = await robot.connect()
@@ -831,11 +1052,19 @@ async def main():
     # Start listening for updates
     listener_task = asyncio.create_task(robot.listen_for_updates())
     
-    # Process task queue periodically
-    while True:
+    # Process task queue periodically until shutdown
+    while not robot.disconnected.is_set():
         await robot.process_task_queue()
-        await asyncio.sleep(1)
+        try:
+            await asyncio.wait_for(robot.disconnected.wait(), timeout=1)
+        except asyncio.TimeoutError:
+            pass
+    
+    listener_task.cancel()
+    await robot.close()
 
 
 if __name__ == "__main__":
+    if UVLOOP_AVAILABLE:
+        uvloop.install()
     asyncio.run(main())
\ No newline at end of file
@@ -9,27 +9,97 @@ Version: 1.0.0
 """
 
 import asyncio
+import atexit
+import inspect
 import json
 import logging
-import math
 import os
+import queue
 import signal
 import sys
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
+from logging.handlers import QueueHandler, QueueListener
 from typing import Dict, List, Optional, Tuple, Any, Union
 import requests
 import websockets
 import numpy as np
 
-# Configure logging
+# Try to import orjson for faster JSON parsing and serialization
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+if ORJSON_AVAILABLE:
+    json_loads = orjson.loads
+
+    def json_dumps(obj: Any) -> str:
+        """Serialize obj to a JSON text frame"""
+        return orjson.dumps(obj).decode('utf-8')
+else:
+    json_loads = json.loads
+    json_dumps = json.dumps
+
+# Try to import matplotlib's Path for batched point-in-polygon queries
+try:
+    from matplotlib.path import Path
+    MATPLOTLIB_AVAILABLE = True
+except ImportError:
+    MATPLOTLIB_AVAILABLE = False
+
+# Try to import aiohttp for non-blocking keep-alive HTTP requests
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+# Try to import numba for the compiled point-in-polygon kernel
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Try to import uvloop for a faster event loop
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+# Timeout in seconds for ESP-NOW service requests
+HTTP_TIMEOUT = 2.0
+
+# Topics the door controller subscribes to on every connection
+DOOR_TOPICS = ("/tracked_pose", "/path", "/planning_state")
+
+# Reconnect delay in seconds, doubled after each failed attempt up to the maximum
+RECONNECT_BACKOFF_MIN = 0.25
+RECONNECT_BACKOFF_MAX = 8.0
+
+# Seconds to wait for a burst of /path updates to settle before checking for doors
+PATH_DEBOUNCE = 0.05
+
+# Give dataclasses a fixed __slots__ layout where supported (Python 3.10+)
+DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# Configure logging; the log file is written from a background thread so
+# that disk writes never block the event loop
+log_queue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, logging.FileHandler('robot-ai-door.log'))
+log_listener.start()
+atexit.register(log_listener.stop)
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler(sys.stdout),
-        logging.FileHandler('robot-ai-door.log')
+        QueueHandler(log_queue)
     ]
 )
 logger = logging.getLogger('robot-ai-door')
@@ -43,14 +113,156 @@ class DoorState(Enum):
     ERROR = "error"
     UNKNOWN = "unknown"
 
-@dataclass
+# Door states by their wire value, so status updates map without raising
+DOOR_STATES = {state.value: state for state in DoorState}
+
+def ws_closed(ws) -> bool:
+    """Whether a WebSocket is missing or closed, on both the legacy and current websockets APIs"""
+    return ws is None or ws.state.name == "CLOSED"
+
+def polygon_edges(polygon: List[Tuple[float, float]]) -> np.ndarray:
+    """
+    Build the edge table used by the vectorized ray casting test
+    
+    Args:
+        polygon: List of (x, y) coordinates forming the polygon
+        
+    Returns:
+        np.ndarray: Rows of per-edge ymin, ymax, y1, x1 and dx/dy (0 for horizontal edges)
+    """
+    start = np.asarray(polygon, dtype=np.float64)
+    end = np.roll(start, -1, axis=0)
+    x1, y1 = start[:, 0], start[:, 1]
+    dx = end[:, 0] - x1
+    dy = end[:, 1] - y1
+    slope = np.divide(dx, dy, out=np.zeros_like(dx), where=dy != 0)
+    return np.stack((np.minimum(y1, end[:, 1]), np.maximum(y1, end[:, 1]), y1, x1, slope))
+
+def point_in_edges(x: float, y: float, edges: np.ndarray) -> bool:
+    """Ray casting point-in-polygon test over a polygon_edges() table"""
+    ymin, ymax, y1, x1, slope = edges
+    crossings = (y > ymin) & (y <= ymax) & (x <= (y - y1) * slope + x1)
+    return bool(np.count_nonzero(crossings) & 1)
+
+def points_in_edges(points: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Ray casting test for an (M, 2) array of points, returning a boolean mask"""
+    ymin, ymax, y1, x1, slope = edges
+    x = points[:, 0, None]
+    y = points[:, 1, None]
+    crossings = (y > ymin) & (y <= ymax) & (x <= (y - y1) * slope + x1)
+    return (np.count_nonzero(crossings, axis=1) & 1).astype(bool)
+
+def _points_in_polygon(points: np.ndarray, vertices: np.ndarray, out: np.ndarray):
+    """Ray casting test of (M, 2) points against (N, 2) polygon vertices, writing a mask into out"""
+    n = vertices.shape[0]
+    for i in range(points.shape[0]):
+        x = points[i, 0]
+        y = points[i, 1]
+        inside = False
+        for j in range(n):
+            x1 = vertices[j, 0]
+            y1 = vertices[j, 1]
+            x2 = vertices[(j + 1) % n, 0]
+            y2 = vertices[(j + 1) % n, 1]
+            if y > min(y1, y2) and y <= max(y1, y2):
+                if x <= (y - y1) * (x2 - x1) / (y2 - y1) + x1:
+                    inside = not inside
+        out[i] = inside
+
+if NUMBA_AVAILABLE:
+    points_in_polygon = njit(cache=True, fastmath=True)(_points_in_polygon)
+else:
+    points_in_polygon = None
+
+@dataclass(**DATACLASS_OPTIONS)
 class AutoDoor:
     """Auto door data class"""
     id: str
     mac_address: str
-    polygon: List[Tuple[float, float]]  # Door area polygon
+    polygon: np.ndarray  # Door area polygon, (N, 2) float64
     state: DoorState
     last_update: float  # Timestamp of last update
+    edges: np.ndarray = field(init=False, repr=False)  # Edge table for ray casting
+    path: Optional[Any] = field(init=False, repr=False)  # matplotlib Path, if available
+    edge_vectors: np.ndarray = field(init=False, repr=False)  # Vector from each vertex to the next
+    bbox: Tuple[float, float, float, float] = field(init=False, repr=False)  # xmin, xmax, ymin, ymax
+    open_payload: Optional[Dict[str, str]] = field(default=None, repr=False)  # Prebuilt ESP-NOW open request
+    
+    def __post_init__(self):
+        self.polygon = np.ascontiguousarray(self.polygon, dtype=np.float64)
+        self.edges = polygon_edges(self.polygon)
+        self.path = Path(self.polygon) if MATPLOTLIB_AVAILABLE else None
+        self.edge_vectors = np.roll(self.polygon, -1, axis=0) - self.polygon
+        xmin, ymin = self.polygon.min(axis=0)
+        xmax, ymax = self.polygon.max(axis=0)
+        self.bbox = (float(xmin), float(xmax), float(ymin), float(ymax))
+    
+    def contains_points(self, points: np.ndarray) -> np.ndarray:
+        """Boolean mask of which (x, y) points lie inside the door polygon"""
+        # Only points within the bounding box need the full polygon test
+        xmin, xmax, ymin, ymax = self.bbox
+        x = points[:, 0]
+        y = points[:, 1]
+        candidates = (x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax)
+        inside = np.zeros(len(points), dtype=np.bool_)
+        if candidates.any():
+            inside[candidates] = self._polygon_mask(points[candidates])
+        return inside
+    
+    def first_entry(self, path: np.ndarray) -> Optional[float]:
+        """
+        Find where a path first enters the door polygon
+        
+        Args:
+            path: (K, 2) array of path positions
+            
+        Returns:
+            Optional[float]: Segment index plus fraction along that segment, or None if never entered
+        """
+        starts = path[:-1]
+        ends = path[1:]
+        
+        # Only segments whose bounding box overlaps the door can touch it
+        xmin, xmax, ymin, ymax = self.bbox
+        near = ((np.minimum(starts[:, 0], ends[:, 0]) <= xmax) & (np.maximum(starts[:, 0], ends[:, 0]) >= xmin) &
+                (np.minimum(starts[:, 1], ends[:, 1]) <= ymax) & (np.maximum(starts[:, 1], ends[:, 1]) >= ymin))
+        segments = np.flatnonzero(near)
+        if not len(segments):
+            return None
+        
+        inside = self.contains_points(path)
+        p = starts[segments]
+        r = ends[segments] - p
+        
+        # Intersect every segment with every polygon edge: p + t*r == q + u*s
+        qp = self.polygon[None, :, :] - p[:, None, :]
+        s = self.edge_vectors[None, :, :]
+        r = r[:, None, :]
+        denom = r[..., 0] * s[..., 1] - r[..., 1] * s[..., 0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = (qp[..., 0] * s[..., 1] - qp[..., 1] * s[..., 0]) / denom
+            u = (qp[..., 0] * r[..., 1] - qp[..., 1] * r[..., 0]) / denom
+        crossings = (denom != 0) & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+        
+        entry = np.where(crossings, t, np.inf).min(axis=1)
+        entry = np.where(inside[segments + 1], np.minimum(entry, 1.0), entry)
+        entry = np.where(inside[segments], 0.0, entry)
+        found = np.isfinite(entry)
+        if not found.any():
+            return None
+        
+        first = int(found.argmax())
+        return float(segments[first] + entry[first])
+    
+    def _polygon_mask(self, points: np.ndarray) -> np.ndarray:
+        """Point-in-polygon mask using the fastest available backend"""
+        if NUMBA_AVAILABLE:
+            inside = np.empty(len(points), dtype=np.bool_)
+            points_in_polygon(points, self.polygon, inside)
+            return inside
+        if self.path is not None:
+            return self.path.contains_points(points)
+        return points_in_edges(points, self.edges)
 
 class DoorController:
     """Controller for automatic door operations"""
@@ -65,6 +277,7 @@ class DoorController:
         self.ws_protocol = "wss" if use_ssl else "ws"
         self.base_url = f"{self.protocol}://{self.robot_ip}:{self.robot_port}"
         self.ws_url = f"{self.ws_protocol}://{self.robot_ip}:{self.robot_port}/ws/v2/topics"
+        self.esp_now_send_url = f"{self.base_url}/services/esp_now/send"
         
         # Registered doors
         self.doors: Dict[str, AutoDoor] = {}
@@ -73,18 +286,27 @@ class DoorController:
         self.robot_position = [0, 0]
         self.robot_orientation = 0
         self.current_path = []  # Current planned path
+        self.path_array = np.empty((0, 2))  # Current path as a (K, 2) float64 array
+        self.path_changed = asyncio.Event()  # Set when a different path arrives
         
         # Door monitoring
-        self.door_check_interval = 2.0  # seconds
         self.door_request_timeout = 10.0  # seconds
-        self.door_recently_requested = {}  # {door_id: timestamp}
+        self.door_recently_requested = {}  # {door_id: time.monotonic() of last request}
+        self.door_open_pending = {}  # {door_id: in-flight open request task}
         
         # WebSocket connection
         self.ws = None
+        self.recv_raw = False  # Whether ws.recv() can hand back undecoded bytes
+        self.reconnect_backoff = 0.0  # Delay before the next reconnect attempt, reset once a message arrives
         self.esp_now_enabled = False
         
+        # HTTP session, created on first request and reused for keep-alive
+        self.http = None
+        
         # Background tasks
         self.monitor_task = None
+        self.recv_task = None
+        self.reader_backoff = 0.0  # Delay before restarting a failed reader, reset once it receives
         
         logger.info(f"Door Controller initialized for robot at {self.base_url}")
     
@@ -93,15 +315,9 @@ class DoorController:
         logger.info(f"Connecting to robot at {self.ws_url}")
         
         try:
-            self.ws = await websockets.connect(self.ws_url)
-            
-            # Enable essential topics
-            message = {"enable_topic": [
-                "/tracked_pose",
-                "/path",
-                "/planning_state"
-            ]}
-            await self.ws.send(json.dumps(message))
+            self.ws = await websockets.connect(self.ws_url, ping_interval=20, ping_timeout=10)
+            self.recv_raw = "decode" in inspect.signature(self.ws.recv).parameters
+            await self.resubscribe()
             
             logger.info("Successfully connected to robot")
             return True
@@ -109,6 +325,21 @@ class DoorController:
             logger.error(f"Failed to connect to robot: {e}")
             return False
     
+    async def resubscribe(self):
+        """Enable the topics the door controller needs on the current connection"""
+        message = {"enable_topic": list(DOOR_TOPICS)}
+        await self.ws.send(json_dumps(message))
+    
+    async def reconnect(self):
+        """Reconnect to the robot, backing off exponentially between attempts"""
+        # The delay carries over between calls, so a gateway that accepts and
+        # then drops the connection straight away is not hammered
+        while True:
+            self.reconnect_backoff = min(max(self.reconnect_backoff * 2, RECONNECT_BACKOFF_MIN), RECONNECT_BACKOFF_MAX)
+            await asyncio.sleep(self.reconnect_backoff)
+            if await self.connect():
+                return
+    
     def register_door(self, door_id: str, mac_address: str, polygon: List[Tuple[float, float]]) -> bool:
         """
         Register a new door
@@ -122,9 +353,13 @@ class DoorController:
             self.doors[door_id] = AutoDoor(
                 id=door_id,
                 mac_address=mac_address,
-                polygon=polygon,
+                polygon=np.ascontiguousarray(polygon, dtype=np.float64),
                 state=DoorState.UNKNOWN,
-                last_update=time.time()
+                last_update=time.time(),
+                open_payload={
+                    "mac": mac_address,
+                    "data": json.dumps({"command": "open", "robot_sn": self.robot_sn})
+                }
             )
             logger.info(f"Registered door {door_id} with MAC {mac_address}")
             return True
@@ -138,7 +373,12 @@ class DoorController:
         if not self.esp_now_enabled:
             await self.enable_esp_now_communication()
         
-        # Start door monitoring
+        # Compile the point-in-polygon kernel now rather than on the first path check
+        if NUMBA_AVAILABLE:
+            points_in_polygon(np.zeros((1, 2)), np.zeros((3, 2)), np.empty(1, dtype=np.bool_))
+        
+        # Start receiving robot updates and door monitoring
+        self._start_ws_reader()
         self.monitor_task = asyncio.create_task(self._door_monitor_loop())
         
         logger.info("Door controller started")
@@ -146,16 +386,40 @@ class DoorController:
     async def stop(self):
         """Stop the door controller"""
         # Cancel background tasks
-        if self.monitor_task and not self.monitor_task.done():
-            self.monitor_task.cancel()
+        for task in (self.recv_task, self.monitor_task):
+            if task and not task.done():
+                task.cancel()
+        # Drop the reader so a restart already queued by its done-callback is skipped
+        self.recv_task = None
         
         # Close WebSocket connection
-        if self.ws and not self.ws.closed:
+        if not ws_closed(self.ws):
             await self.ws.close()
             logger.info("WebSocket connection closed")
         
+        if self.http is not None:
+            await self.http.close()
+            self.http = None
+        
         logger.info("Door controller stopped")
     
+    async def http_post(self, url: str, payload: Optional[Dict[str, Any]] = None) -> Tuple[int, str]:
+        """
+        POST to the robot HTTP API, reusing one session when aiohttp is available
+        
+        Returns:
+            Tuple[int, str]: Status code and response body
+        """
+        if AIOHTTP_AVAILABLE:
+            if self.http is None:
+                self.http = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT))
+            async with self.http.post(url, json=payload) as response:
+                return response.status, await response.text()
+        
+        # Without aiohttp, keep the blocking request off the event loop
+        response = await asyncio.to_thread(requests.post, url, json=payload, timeout=HTTP_TIMEOUT)
+        return response.status_code, response.text
+    
     async def enable_esp_now_communication(self) -> bool:
         """
         Enable ESP-NOW communication protocol for door control
@@ -163,14 +427,14 @@ class DoorController:
         try:
             # Check if ESP-NOW service is available
             url = f"{self.base_url}/services/esp_now/enable"
-            response = requests.post(url)
+            status, text = await self.http_post(url)
             
-            if response.status_code == 200:
+            if status == 200:
                 self.esp_now_enabled = True
                 logger.info("ESP-NOW communication enabled")
                 return True
             else:
-                logger.error(f"Failed to enable ESP-NOW: {response.status_code} {response.text}")
+                logger.error(f"Failed to enable ESP-NOW: {status} {text}")
                 return False
                 
         except Exception as e:
@@ -186,7 +450,7 @@ class DoorController:
             status_data: Dictionary containing status information
         """
         if door_id not in self.doors:
-            logger.warning(f"Received status update for unknown door {door_id}")
+            logger.warning("Received status update for unknown door %s", door_id)
             return False
         
         try:
@@ -194,19 +458,15 @@ class DoorController:
             
             # Update door state based on received data
             if "state" in status_data:
-                state_str = status_data["state"]
                 # Map the received state string to DoorState enum
-                try:
-                    door.state = DoorState(state_str)
-                except ValueError:
-                    door.state = DoorState.UNKNOWN
+                door.state = DOOR_STATES.get(status_data["state"], DoorState.UNKNOWN)
             
             door.last_update = time.time()
-            logger.info(f"Updated door {door_id} status: state={door.state.value}")
+            logger.info("Updated door %s status: state=%s", door_id, door.state.value)
             return True
             
         except Exception as e:
-            logger.error(f"Error updating door status: {e}")
+            logger.error("Error updating door status: %s", e)
             return False
     
     async def process_esp_now_message(self, message: Dict[str, Any]) -> bool:
@@ -229,7 +489,7 @@ class DoorController:
             return False
             
         except Exception as e:
-            logger.error(f"Error processing ESP-NOW message: {e}")
+            logger.error("Error processing ESP-NOW message: %s", e)
             return False
     
     async def request_door_open(self, door_id: str) -> bool:
@@ -248,40 +508,40 @@ class DoorController:
         
         door = self.doors[door_id]
         
-        # Check if we recently requested this door to open
-        now = time.time()
-        if door_id in self.door_recently_requested:
-            last_request = self.door_recently_requested[door_id]
+        # Check if we recently requested this door to open, using the monotonic
+        # clock so wall clock adjustments cannot extend or cut the window
+        now = time.monotonic()
+        last_request = self.door_recently_requested.get(door_id)
+        if last_request is not None:
             if now - last_request < self.door_request_timeout:
-                logger.info(f"Door {door_id} was recently requested, skipping")
+                logger.info("Door %s was recently requested, skipping", door_id)
                 return True
+            del self.door_recently_requested[door_id]
         
+        # Share a request that is already in flight rather than sending the
+        # same command twice
+        pending = self.door_open_pending.get(door_id)
+        if pending is None:
+            pending = asyncio.create_task(self._send_door_open(door, now))
+            self.door_open_pending[door_id] = pending
+            pending.add_done_callback(lambda _: self.door_open_pending.pop(door_id, None))
+        return await asyncio.shield(pending)
+    
+    async def _send_door_open(self, door: AutoDoor, now: float) -> bool:
+        """Send a door's prebuilt open command through the ESP-NOW service"""
         try:
-            # Send ESP-NOW message to the door
-            message = {
-                "command": "open",
-                "robot_sn": self.robot_sn
-            }
-            
-            # Use the ESP-NOW service to send the message
-            url = f"{self.base_url}/services/esp_now/send"
-            payload = {
-                "mac": door.mac_address,
-                "data": json.dumps(message)
-            }
-            
-            response = requests.post(url, json=payload)
+            status, text = await self.http_post(self.esp_now_send_url, door.open_payload)
             
-            if response.status_code == 200:
-                logger.info(f"Requested door {door_id} to open")
-                self.door_recently_requested[door_id] = now
+            if status == 200:
+                logger.info("Requested door %s to open", door.id)
+                self.door_recently_requested[door.id] = now
                 return True
             else:
-                logger.error(f"Failed to request door open: {response.status_code} {response.text}")
+                logger.error("Failed to request door open: %s %s", status, text)
                 return False
                 
         except Exception as e:
-            logger.error(f"Error requesting door open: {e}")
+            logger.error("Error requesting door open: %s", e)
             return False
     
     def is_point_in_polygon(self, point: Tuple[float, float], polygon: List[Tuple[float, float]]) -> bool:
@@ -295,83 +555,134 @@ class DoorController:
         Returns:
             bool: True if point is inside polygon
         """
-        x, y = point
-        n = len(polygon)
-        inside = False
+        return point_in_edges(point[0], point[1], polygon_edges(polygon))
+    
+    def set_path(self, positions: List[List[float]]):
+        """
+        Replace the current planned path, converting it once for the door checks
         
-        p1x, p1y = polygon[0]
-        for i in range(1, n + 1):
-            p2x, p2y = polygon[i % n]
-            if y > min(p1y, p2y):
-                if y <= max(p1y, p2y):
-                    if x <= max(p1x, p2x):
-                        if p1y != p2y:
-                            xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
-                        if p1x == p2x or x <= xinters:
-                            inside = not inside
-            p1x, p1y = p2x, p2y
+        Raises:
+            ValueError: If positions is not a list of [x, y, ...] points; the
+                current path is left unchanged
+        """
+        if positions:
+            path_array = np.asarray(positions, dtype=np.float64)
+            if path_array.ndim != 2 or path_array.shape[1] < 2:
+                raise ValueError(f"Path positions must be [x, y] points, got shape {path_array.shape}")
+            path_array = path_array[:, :2]
+        else:
+            path_array = np.empty((0, 2))
         
-        return inside
+        # Only swap in the new path once it has converted cleanly, so the list
+        # and the array always describe the same path
+        self.path_array = path_array
+        self.current_path = positions
     
-    def check_door_on_path(self) -> Optional[str]:
+    def check_doors_on_path(self) -> List[str]:
         """
-        Check if the robot's current path passes through any registered door
+        Find every registered door the robot's current path passes through
         
         Returns:
-            Optional[str]: Door ID if a door is on the path, None otherwise
+            List[str]: Door IDs in the order the path reaches them
         """
-        if not self.current_path or len(self.current_path) < 2:
-            return None
+        path = self.path_array
+        if len(path) < 2:
+            return []
         
-        # For each segment in the path
-        for i in range(len(self.current_path) - 1):
-            start = self.current_path[i]
-            end = self.current_path[i + 1]
-            
-            # Create a set of points along the segment
-            num_points = 10  # Number of points to check along the segment
-            for j in range(num_points + 1):
-                t = j / num_points
-                point_x = start[0] + t * (end[0] - start[0])
-                point_y = start[1] + t * (end[1] - start[1])
-                
-                # Check if this point is inside any door's polygon
-                for door_id, door in self.doors.items():
-                    if self.is_point_in_polygon((point_x, point_y), door.polygon):
-                        return door_id
+        # Test each segment exactly against the door polygons, noting where the
+        # path first enters each one
+        entries = []
+        for door_id, door in self.doors.items():
+            position = door.first_entry(path)
+            if position is not None:
+                entries.append((position, door_id))
         
-        return None
+        entries.sort()
+        return [door_id for _, door_id in entries]
     
-    async def _door_monitor_loop(self):
-        """Monitor robot path and automatically request doors to open"""
+    def check_door_on_path(self) -> Optional[str]:
+        """
+        Check if the robot's current path passes through any registered door
+        
+        Returns:
+            Optional[str]: ID of the first door on the path, None otherwise
+        """
+        door_ids = self.check_doors_on_path()
+        return door_ids[0] if door_ids else None
+    
+    async def open_doors(self, door_ids: List[str]) -> List[bool]:
+        """Request several doors to open concurrently"""
+        return await asyncio.gather(*(self.request_door_open(door_id) for door_id in door_ids))
+    
+    def _start_ws_reader(self, delay: float = 0.0):
+        """Start the WebSocket reader task, restarting it if it ever stops on its own"""
+        self.recv_task = asyncio.create_task(self._ws_reader(delay))
+        self.recv_task.add_done_callback(self._on_ws_reader_done)
+    
+    def _on_ws_reader_done(self, task: asyncio.Task):
+        """Restart the WebSocket reader unless it was cancelled, backing off on repeated failures"""
+        if task.cancelled() or task is not self.recv_task:
+            return
+        self.reader_backoff = min(max(self.reader_backoff * 2, RECONNECT_BACKOFF_MIN), RECONNECT_BACKOFF_MAX)
+        logger.warning("WebSocket reader stopped unexpectedly, restarting in %.2fs", self.reader_backoff)
+        self._start_ws_reader(self.reader_backoff)
+    
+    async def _ws_reader(self, delay: float = 0.0):
+        """Receive WebSocket messages and process them as they arrive"""
         try:
+            await asyncio.sleep(delay)
             while True:
-                # Process WebSocket messages
-                if self.ws and not self.ws.closed:
+                if not ws_closed(self.ws):
                     try:
-                        message = await asyncio.wait_for(self.ws.recv(), timeout=0.1)
+                        # Skip the str decode where supported; JSON parses bytes directly
+                        if self.recv_raw:
+                            message = await self.ws.recv(decode=False)
+                        else:
+                            message = await self.ws.recv()
+                        self.reader_backoff = 0.0
+                        self.reconnect_backoff = 0.0
                         await self._process_websocket_message(message)
-                    except asyncio.TimeoutError:
-                        pass
                     except websockets.exceptions.ConnectionClosed:
                         logger.warning("WebSocket connection closed")
-                        await asyncio.sleep(2)
-                        # Try to reconnect
-                        connected = await self.connect()
-                        if not connected:
-                            await asyncio.sleep(5)
+                        await self.reconnect()
                     except Exception as e:
-                        logger.error(f"Error processing WebSocket message: {e}")
+                        logger.error("Error processing WebSocket message: %s", e)
+                else:
+                    await self.reconnect()
                 
-                # Check if there's a door on the path
-                door_id = self.check_door_on_path()
-                if door_id:
-                    logger.info(f"Detected door {door_id} on the path")
-                    
-                    # Request the door to open
-                    await self.request_door_open(door_id)
+        except asyncio.CancelledError:
+            logger.info("WebSocket reader cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in WebSocket reader: {e}")
+    
+    async def _door_monitor_loop(self):
+        """Monitor robot path and automatically request doors to open"""
+        try:
+            while True:
+                # Wake when the path changes, and again once a request has
+                # expired in case the door closed before the robot got there
+                try:
+                    await asyncio.wait_for(self.path_changed.wait(), timeout=self.door_request_timeout)
+                except asyncio.TimeoutError:
+                    pass
+                else:
+                    # Let a burst of replans settle so it costs a single check
+                    await asyncio.sleep(PATH_DEBOUNCE)
+                self.path_changed.clear()
                 
-                await asyncio.sleep(self.door_check_interval)
+                # Check if there are doors on the path; a failure here must not
+                # stop monitoring, so log it and carry on
+                try:
+                    door_ids = self.check_doors_on_path()
+                    if door_ids:
+                        logger.info("Detected doors %s on the path", door_ids)
+                        
+                        # Request all of them to open at once
+                        await self.open_doors(door_ids)
+                except Exception as e:
+                    logger.error("Error checking doors on path: %s", e)
+                    await asyncio.sleep(0.5)
                 
         except asyncio.CancelledError:
             logger.info("Door monitor loop cancelled")
@@ -379,10 +690,10 @@ class DoorController:
         except Exception as e:
             logger.error(f"Unexpected error in door monitor loop: {e}")
     
-    async def _process_websocket_message(self, message: str):
+    async def _process_websocket_message(self, message: Union[str, bytes]):
         """Process incoming WebSocket messages"""
         try:
-            data = json.loads(message)
+            data = json_loads(message)
             topic = data.get("topic")
             
             if not topic:
@@ -395,25 +706,26 @@ class DoorController:
                 self.robot_orientation = data.get("ori", 0)
                 
             elif topic == "/path":
-                # Update current path
-                self.current_path = data.get("positions", [])
+                # Update current path, flagging it for a door check only if it changed
+                positions = data.get("positions", [])
+                if positions != self.current_path:
+                    self.set_path(positions)
+                    self.path_changed.set()
                 
             elif topic == "/planning_state":
                 # Handle planning state updates
                 move_state = data.get("move_state")
                 
-                # If robot started moving, check for doors on the path
+                # If robot started moving, have the monitor loop check for doors
+                # on the path; the requests are sent from there so the reader
+                # never waits on the ESP-NOW service
                 if move_state == "moving" and self.current_path:
-                    door_id = self.check_door_on_path()
-                    if door_id:
-                        logger.info(f"Robot started moving and door {door_id} is on the path")
-                        # Request the door to open
-                        await self.request_door_open(door_id)
+                    self.path_changed.set()
                 
         except json.JSONDecodeError:
-            logger.error(f"Invalid JSON message: {message}")
+            logger.error("Invalid JSON message: %s", message)
         except Exception as e:
-            logger.error(f"Error processing WebSocket message: {e}")
+            logger.error("Error processing WebSocket message: %s", e)
     
     def get_door_status(self, door_id: str = None) -> Dict[str, Any]:
         """
@@ -498,4 +810,6 @@ async def main():
 
 
 if __name__ == "__main__":
+    if UVLOOP_AVAILABLE:
+        uvloop.install()
     asyncio.run(main())
\ No newline at end of file
@@ -550,19 +550,26 @@ def check_required_packages():
     missing_packages = []
     
     try:
-        import importlib
-        for package in required_packages:
-            try:
-                importlib.import_module(package)
-            except ImportError:
-                missing_packages.append(package)
+        import importlib.util
+        # find_spec only locates the package on sys.path; it does not execute
+        # the package's import-time code just to prove it is installed
+        missing_packages = [
+            package for package in required_packages
+            if importlib.util.find_spec(package) is None
+        ]
         
         if missing_packages:
             logger.warning(f"Missing required packages: {', '.join(missing_packages)}")
             logger.info("Attempting to install missing packages...")
             
+            # Resolve everything in a single pip run; skip the version check
+            # round-trip and bytecode compilation to keep provisioning fast
+            pip_env = dict(os.environ, PIP_DISABLE_PIP_VERSION_CHECK="1", PIP_NO_INPUT="1")
             try:
-                subprocess.check_call([sys.executable, "-m", "pip", "install"] + missing_packages)
+                subprocess.check_call(
+                    [sys.executable, "-m", "pip", "install", "--prefer-binary", "--no-compile"] + missing_packages,
+                    env=pip_env
+                )
                 logger.info("Successfully installed missing packages")
             except Exception as e:
                 logger.error(f"Failed to install packages: {e}")
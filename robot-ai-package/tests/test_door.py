@@ -0,0 +1,59 @@
+"""
+Tests for the door controller's path handling
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from modules.door import DoorController
+
+
+def make_controller() -> DoorController:
+    """Create a controller with one square door spanning (0, 0)-(2, 2)"""
+    controller = DoorController(robot_ip="127.0.0.1", robot_sn="test")
+    controller.register_door("door", "00:00:00:00:00:00", [(0, 0), (2, 0), (2, 2), (0, 2)])
+    return controller
+
+
+@pytest.mark.parametrize("positions", [
+    [[-1, 1], [3]],  # Ragged points
+    [-1, 1, 3, 1],  # 1-D list of coordinates
+    [[-1], [3]],  # Points without a y coordinate
+])
+def test_malformed_path_keeps_current_path(positions):
+    controller = make_controller()
+    controller.set_path([[-1, 1], [3, 1]])
+
+    with pytest.raises(ValueError):
+        controller.set_path(positions)
+
+    # The list and the array must still describe the previous path
+    assert controller.current_path == [[-1, 1], [3, 1]]
+    assert controller.path_array.tolist() == [[-1.0, 1.0], [3.0, 1.0]]
+    assert controller.check_doors_on_path() == ["door"]
+
+
+def test_malformed_path_message_does_not_block_resend():
+    controller = make_controller()
+    good_path = [[-1, 5], [3, 5]]
+
+    async def send(positions):
+        await controller._process_websocket_message(json.dumps({"topic": "/path", "positions": positions}))
+
+    async def run():
+        await send([[-1, 1], [3, 1]])
+        await send([[-1, 5], [3]])
+        await send(good_path)
+
+    asyncio.run(run())
+
+    # The path that follows a malformed one is applied, not skipped as unchanged
+    assert controller.current_path == good_path
+    assert controller.path_array.tolist() == [[-1.0, 5.0], [3.0, 5.0]]
+    assert controller.check_doors_on_path() == []